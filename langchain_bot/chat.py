@@ -6,18 +6,22 @@ Usage:
 Environment variables:
     OPENAI_API_KEY           - required for LangChain ChatOpenAI
     MCP_SERVER_URL           - defaults to http://127.0.0.1:8090/requests
+    GITHUB_TOKENS            - optional comma-separated tokens used round-robin
+                               (falls back to GITHUB_TOKEN)
 """
 
 from __future__ import annotations
 
-import base64
+import asyncio
+import itertools
 import os
+import random
 import re
 import sys
+import time
 from typing import Dict
 
 import httpx
-import requests
 from dotenv import load_dotenv
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -28,6 +32,19 @@ load_dotenv()
 
 MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://127.0.0.1:8090/requests")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # Optional: for higher rate limits
+GITHUB_TOKENS = [
+    token.strip()
+    for token in os.getenv("GITHUB_TOKENS", GITHUB_TOKEN or "").split(",")
+    if token.strip()
+]
+
+_REPO_URL_PATTERNS = (
+    re.compile(r"github\.com/([^/]+)/([^/]+)"),  # github.com/username/repo
+    re.compile(r"\A([^/]+)/([^/]+)\Z"),  # username/repo
+)
+_ADDR_RE = re.compile(r"\A0x[0-9a-fA-F]{40}\Z")
+# bsc.address holds a single address; anything bigger isn't worth decoding
+_BSC_ADDRESS_MAX_SIZE = 4096
 
 # OpenAI's client will auto-read proxy env vars; clear them here so we don't
 # accidentally pass unsupported `proxies` args from environment into the client.
@@ -42,6 +59,157 @@ for proxy_var in (
 ):
     os.environ.pop(proxy_var, None)
 
+# Shared client so GitHub and MCP calls reuse pooled keep-alive connections
+# instead of paying a fresh TCP + TLS handshake per request.
+_gh_client = httpx.AsyncClient(http2=True, timeout=10, trust_env=False)
+
+# Exponential backoff (with jitter) for rate-limited or failing GitHub calls.
+# The deadline bounds a whole call, retries included, so one tool call can't
+# stall the conversation.
+GITHUB_MAX_RETRIES = 5
+GITHUB_RETRY_DEADLINE = 10.0
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 32.0
+
+# Round-robin over GITHUB_TOKENS, skipping tokens that are nearly out of quota
+# until their window resets. Limits are token -> (remaining, reset_epoch).
+_TOKEN_MIN_REMAINING = 10
+_token_cycle = itertools.cycle(GITHUB_TOKENS)
+_token_limits: dict[str, tuple[int, int]] = {}
+
+# bsc.address lookups keyed by (user, repo) -> (etag, wallet, fetched_at).
+# Fresh entries skip the network; stale ones are revalidated with
+# If-None-Match, and GitHub does not charge 304s against the rate limit.
+_WALLET_CACHE_TTL = 60.0
+_WALLET_CACHE_MAX = 1024
+_WALLET_CACHE: dict[tuple[str, str], tuple[str, str | None, float]] = {}
+
+# In-flight wallet lookups keyed by (user, repo_url)
+_INFLIGHT: dict[tuple[str, str | None], asyncio.Task] = {}
+
+
+def _next_token() -> str | None:
+    """Pick the next GitHub token with rate-limit headroom, if any are configured."""
+    if not GITHUB_TOKENS:
+        return None
+    now = time.time()
+    for _ in range(len(GITHUB_TOKENS)):
+        token = next(_token_cycle)
+        remaining, reset = _token_limits.get(token, (_TOKEN_MIN_REMAINING, 0))
+        if remaining >= _TOKEN_MIN_REMAINING or now >= reset:
+            return token
+    # Every token is nearly exhausted; let the retry logic handle the 403s
+    return next(_token_cycle)
+
+
+def _record_token_limit(token: str, resp: httpx.Response) -> None:
+    remaining = resp.headers.get("X-RateLimit-Remaining", "")
+    reset = resp.headers.get("X-RateLimit-Reset", "")
+    if remaining.isdigit() and reset.isdigit():
+        _token_limits[token] = (int(remaining), int(reset))
+
+
+def _retry_delay(resp: httpx.Response, attempt: int) -> float | None:
+    """
+    Return how long to wait before retrying a GitHub response, or None if the
+    response should be returned as-is.
+    """
+    backoff = min(_BACKOFF_CAP, _BACKOFF_BASE * 2**attempt) + random.uniform(0, _BACKOFF_BASE)
+    status = resp.status_code
+
+    if status == 403 and resp.headers.get("X-RateLimit-Remaining") == "0":
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if not reset or not reset.isdigit():
+            return backoff
+        delay = max(0.0, int(reset) - time.time())
+    elif status in (403, 429) and resp.headers.get("Retry-After", "").isdigit():
+        delay = float(resp.headers["Retry-After"])
+    elif status == 429 or status >= 500:
+        return backoff
+    else:
+        return None
+
+    # Don't stall the conversation waiting out a long primary rate-limit window
+    return delay if delay <= _BACKOFF_CAP else None
+
+
+class ResponseTooLarge(httpx.HTTPError):
+    """A GitHub response body was larger than the caller's max_bytes."""
+
+
+async def _read_capped(resp: httpx.Response, max_bytes: int) -> httpx.Response:
+    """Buffer a streamed response, giving up as soon as it passes max_bytes."""
+    declared = resp.headers.get("Content-Length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise ResponseTooLarge(f"{resp.url} is {declared} bytes")
+
+    body = b""
+    async for chunk in resp.aiter_bytes():
+        body += chunk
+        if len(body) > max_bytes:
+            raise ResponseTooLarge(f"{resp.url} is over {max_bytes} bytes")
+
+    # aiter_bytes already decoded the body, so drop the encoding headers
+    headers = [
+        (name, value)
+        for name, value in resp.headers.multi_items()
+        if name.lower() not in ("content-encoding", "content-length")
+    ]
+    return httpx.Response(
+        resp.status_code, headers=headers, content=body, request=resp.request
+    )
+
+
+async def _gh_get(
+    url: str, *, max_bytes: int | None = None, **kwargs
+) -> httpx.Response:
+    """GET once, reading at most max_bytes of the body when a cap is given."""
+    if max_bytes is None:
+        return await _gh_client.get(url, **kwargs)
+
+    request = _gh_client.build_request("GET", url, **kwargs)
+    resp = await _gh_client.send(request, stream=True)
+    try:
+        return await _read_capped(resp, max_bytes)
+    finally:
+        await resp.aclose()
+
+
+async def _gh_get_with_retry(
+    url: str,
+    *,
+    headers: Dict[str, str] | None = None,
+    max_retries: int = GITHUB_MAX_RETRIES,
+    max_bytes: int | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """
+    GET a GitHub API URL, retrying on rate limits and 5xx responses until
+    GITHUB_RETRY_DEADLINE has passed. With max_bytes, larger bodies raise
+    ResponseTooLarge before they are fully downloaded.
+    """
+    deadline = time.monotonic() + GITHUB_RETRY_DEADLINE
+    for attempt in range(max_retries + 1):
+        token = _next_token()
+        auth = {"Authorization": f"token {token}"} if token else {}
+        resp = await _gh_get(
+            url,
+            max_bytes=max_bytes,
+            headers={**auth, **(headers or {})},
+            timeout=deadline - time.monotonic(),
+            **kwargs,
+        )
+        if token:
+            _record_token_limit(token, resp)
+        delay = _retry_delay(resp, attempt)
+        if delay is None or attempt == max_retries:
+            return resp
+        # Don't start a retry that couldn't finish before the deadline
+        if time.monotonic() + delay >= deadline:
+            return resp
+        await asyncio.sleep(delay)
+    return resp
+
 
 def parse_github_repo_url(repo_url: str) -> tuple[str, str] | None:
     """
@@ -55,22 +223,92 @@ def parse_github_repo_url(repo_url: str) -> tuple[str, str] | None:
     """
     # Remove trailing slash and whitespace
     repo_url = repo_url.strip().rstrip("/")
-    
+
+    # Every supported format contains at least one slash
+    if "/" not in repo_url:
+        return None
+
     # Try to extract username/repo from various URL formats
-    patterns = [
-        r"github\.com/([^/]+)/([^/]+)",  # github.com/username/repo
-        r"^([^/]+)/([^/]+)$",  # username/repo
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, repo_url)
+    for pattern in _REPO_URL_PATTERNS:
+        match = pattern.search(repo_url)
         if match:
             return (match.group(1), match.group(2))
     
     return None
 
 
-def fetch_wallet_from_github(github_username: str, repo_url: str | None = None) -> str | None:
+def _cache_wallet(key: tuple[str, str], etag: str, wallet: str | None) -> None:
+    """Store a bsc.address lookup, evicting the least recently stored entry."""
+    _WALLET_CACHE.pop(key, None)
+    if len(_WALLET_CACHE) >= _WALLET_CACHE_MAX:
+        del _WALLET_CACHE[next(iter(_WALLET_CACHE))]
+    _WALLET_CACHE[key] = (etag, wallet, time.monotonic())
+
+
+def _fresh_wallet(key: tuple[str, str]) -> tuple[bool, str | None]:
+    """Return (hit, wallet) for a cached bsc.address lookup still within its TTL."""
+    cached = _WALLET_CACHE.get(key)
+    if cached and time.monotonic() - cached[2] < _WALLET_CACHE_TTL:
+        return (True, cached[1])
+    return (False, None)
+
+
+async def _fetch_bsc_address(github_username: str, repo_name: str) -> str | None:
+    """Fetch and validate the bsc.address file from the root of a repository."""
+    key = (github_username.lower(), repo_name.lower())
+    hit, wallet = _fresh_wallet(key)
+    if hit:
+        return wallet
+
+    cached = _WALLET_CACHE.get(key)
+    # Raw media type returns the file body itself: no JSON envelope or base64
+    headers = {"Accept": "application/vnd.github.raw"}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    try:
+        file_resp = await _gh_get_with_retry(
+            f"https://api.github.com/repos/{github_username}/{repo_name}/contents/bsc.address",
+            headers=headers,
+            max_bytes=_BSC_ADDRESS_MAX_SIZE,
+        )
+    except ResponseTooLarge:
+        # Too big to hold a single address; treat it like a missing file
+        return None
+
+    if file_resp.status_code == 304 and cached:
+        _cache_wallet(key, cached[0], cached[1])
+        return cached[1]
+
+    wallet = None
+    if file_resp.status_code == 200:
+        content = file_resp.text.strip()
+        if _ADDR_RE.match(content):
+            wallet = content
+
+        etag = file_resp.headers.get("ETag")
+        if etag:
+            _cache_wallet(key, etag, wallet)
+
+    return wallet
+
+
+async def _fetch_latest_repo_bsc(github_username: str) -> str | None:
+    """Fetch bsc.address from the user's most recently updated repository."""
+    repos_resp = await _gh_get_with_retry(
+        f"https://api.github.com/users/{github_username}/repos",
+        params={"sort": "updated", "per_page": 1},
+    )
+    repos_resp.raise_for_status()
+    repos = repos_resp.json()
+
+    if not repos:
+        return None
+
+    return await _fetch_bsc_address(github_username, repos[0]["name"])
+
+
+async def fetch_wallet_from_github(github_username: str, repo_url: str | None = None) -> str | None:
     """
     Fetch wallet address from bsc.address file.
     
@@ -82,80 +320,61 @@ def fetch_wallet_from_github(github_username: str, repo_url: str | None = None)
     
     Returns wallet address or None if not found.
     """
-    headers = {}
-    if GITHUB_TOKEN:
-        headers["Authorization"] = f"token {GITHUB_TOKEN}"
-    
+    # Concurrent lookups for the same user and repo share one GitHub round trip
+    key = (github_username.lower(), repo_url)
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_wallet(github_username, repo_url))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    # Shield so one caller giving up doesn't cancel the lookup for the others
+    return await asyncio.shield(task)
+
+
+async def _fetch_wallet(github_username: str, repo_url: str | None) -> str | None:
+    """Resolve the wallet for fetch_wallet_from_github."""
+    repo_name = None
+
+    # If repo_url is provided, parse it to get username and repo name
+    if repo_url:
+        parsed = parse_github_repo_url(repo_url)
+        if parsed:
+            repo_username, repo_name = parsed
+            # Use the username from the URL if it matches, otherwise use provided username
+            if repo_username.lower() != github_username.lower():
+                # URL username doesn't match provided username - use URL username
+                github_username = repo_username
+
     try:
-        repo_name = None
-        
-        # If repo_url is provided, parse it to get username and repo name
-        if repo_url:
-            parsed = parse_github_repo_url(repo_url)
-            if parsed:
-                repo_username, repo_name = parsed
-                # Use the username from the URL if it matches, otherwise use provided username
-                if repo_username.lower() != github_username.lower():
-                    # URL username doesn't match provided username - use URL username
-                    github_username = repo_username
-            else:
-                # Invalid repo URL format, fall back to checking user's repos
-                repo_url = None
-        
-        # If we have a specific repo name, use it directly
-        if repo_name:
-            file_resp = requests.get(
-                f"https://api.github.com/repos/{github_username}/{repo_name}/contents/bsc.address",
-                headers=headers,
-                timeout=10,
-            )
-            
-            if file_resp.status_code == 200:
-                file_data = file_resp.json()
-                if file_data.get("encoding") == "base64":
-                    content = base64.b64decode(file_data["content"]).decode("utf-8")
-                    wallet = content.strip()
-                    if wallet.startswith("0x") and len(wallet) == 42:
-                        return wallet
-        
-        # Fall back to checking user's most recently updated repository
-        repos_resp = requests.get(
-            f"https://api.github.com/users/{github_username}/repos",
-            headers=headers,
-            params={"sort": "updated", "per_page": 1},
-            timeout=10,
-        )
-        repos_resp.raise_for_status()
-        repos = repos_resp.json()
-        
-        if not repos:
-            return None
-        
-        # Get the first repository
-        repo_name = repos[0]["name"]
-        
-        # Try to fetch bsc.address file from root directory
-        file_resp = requests.get(
-            f"https://api.github.com/repos/{github_username}/{repo_name}/contents/bsc.address",
-            headers=headers,
-            timeout=10,
-        )
-        
-        if file_resp.status_code == 200:
-            file_data = file_resp.json()
-            if file_data.get("encoding") == "base64":
-                content = base64.b64decode(file_data["content"]).decode("utf-8")
-                wallet = content.strip()
-                if wallet.startswith("0x") and len(wallet) == 42:
-                    return wallet
-        
-        return None
-    except requests.RequestException:
+        if not repo_name:
+            return await _fetch_latest_repo_bsc(github_username)
+
+        # A fresh cache entry answers for the specific repo without any
+        # network call; only fall back to the latest repo if it has no wallet
+        hit, wallet = _fresh_wallet((github_username.lower(), repo_name.lower()))
+        if hit:
+            return wallet or await _fetch_latest_repo_bsc(github_username)
+
+        # Probe the specific repo and the fallback repo concurrently; the
+        # specific repo wins whenever it holds a valid wallet.
+        specific = asyncio.create_task(_fetch_bsc_address(github_username, repo_name))
+        fallback = asyncio.create_task(_fetch_latest_repo_bsc(github_username))
+        try:
+            try:
+                wallet = await specific
+            except httpx.HTTPError:
+                wallet = None
+            if wallet:
+                return wallet
+            return await fallback
+        finally:
+            fallback.cancel()
+    except httpx.HTTPError:
         return None
 
 
 @tool("issue_tbnb", return_direct=True)
-def issue_tbnb(
+async def issue_tbnb(
     github_username: str,
     repo_url: str | None = None,
     builder_id: str | None = None,
@@ -181,7 +400,7 @@ def issue_tbnb(
         return "github_username is required for verification."
 
     # Fetch wallet address from GitHub repo
-    wallet_address = fetch_wallet_from_github(github_username, repo_url)
+    wallet_address = await fetch_wallet_from_github(github_username, repo_url)
     if not wallet_address:
         if repo_url:
             return (
@@ -205,15 +424,15 @@ def issue_tbnb(
     }
 
     try:
-        response = requests.post(
+        response = await _gh_client.post(
             MCP_SERVER_URL,
             json=payload,
             timeout=30,
         )
         response.raise_for_status()
-    except requests.RequestException as exc:  # pragma: no cover - interactive
+    except httpx.HTTPError as exc:  # pragma: no cover - interactive
         error_detail = str(exc)
-        if hasattr(exc, "response") and exc.response is not None:
+        if isinstance(exc, httpx.HTTPStatusError):
             try:
                 error_data = exc.response.json()
                 error_detail = error_data.get("detail", error_detail)
@@ -224,34 +443,15 @@ def issue_tbnb(
     data = response.json()
     tx_hash = data.get("tx_hash", "unknown")
     return (
-        f"Payout approved! Sent tBNB to {wallet_address}. "
+        f"Payout approved! tBNB transfer to {wallet_address} submitted. "
         f"Transaction hash: {tx_hash}. "
         f"Verification: {data.get('verification', {}).get('reason', 'N/A')}"
     )
 
 
-def main() -> None:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        print("OPENAI_API_KEY is required", file=sys.stderr)
-        raise SystemExit(1)
-
-    # Create httpx clients without proxies to avoid the 'proxies' argument error
-    # trust_env=False prevents reading proxy env vars
-    sync_client = httpx.Client(trust_env=False)
-    async_client = httpx.AsyncClient(trust_env=False)
-    llm = ChatOpenAI(
-        temperature=0,
-        http_client=sync_client,
-        http_async_client=async_client,
-    )
-    tools = [issue_tbnb]
-
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            (
-                "system",
-                """You are BNB Support AI, helping verified builders obtain tBNB for development.
+# Built once at import. The system text is sent verbatim as the leading
+# message every turn, so OpenAI's prompt cache can reuse the prefix.
+_SYSTEM_PROMPT = """You are BNB Support AI, helping verified builders obtain tBNB for development.
 
 IMPORTANT: When users ask "how to get tBNB", "how do I get tBNB", "how to obtain tBNB", or similar questions about getting started, you MUST share the detailed step-by-step tutorial below. Provide comprehensive instructions with explanations.
 
@@ -321,26 +521,54 @@ RESPONSE GUIDELINES:
 - When users ask "how to get tBNB" or similar, ALWAYS share the full detailed tutorial
 - For rate limit questions, provide the detailed explanation above
 - Be thorough and helpful, explaining each step clearly
-- If users encounter issues, guide them through troubleshooting""",
-            ),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ]
+- If users encounter issues, guide them through troubleshooting"""
+
+_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        ("system", _SYSTEM_PROMPT),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ]
+)
+
+
+async def _chat_loop(agent_executor: AgentExecutor) -> None:
+    print("BNB Support AI (type 'exit' to quit)")
+    try:
+        while True:
+            user_input = (await asyncio.to_thread(input, "builder> ")).strip()
+            if not user_input:
+                continue
+            if user_input.lower() in {"exit", "quit"}:
+                print("Goodbye!")
+                break
+            result = await agent_executor.ainvoke({"input": user_input})
+            print(f"assistant> {result['output']}")
+    finally:
+        await _gh_client.aclose()
+
+
+def main() -> None:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("OPENAI_API_KEY is required", file=sys.stderr)
+        raise SystemExit(1)
+
+    # Create httpx clients without proxies to avoid the 'proxies' argument error
+    # trust_env=False prevents reading proxy env vars
+    sync_client = httpx.Client(trust_env=False)
+    async_client = httpx.AsyncClient(trust_env=False)
+    llm = ChatOpenAI(
+        temperature=0,
+        http_client=sync_client,
+        http_async_client=async_client,
     )
+    tools = [issue_tbnb]
 
-    agent = create_openai_tools_agent(llm, tools, prompt)
+    agent = create_openai_tools_agent(llm, tools, _PROMPT_TEMPLATE)
     agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
 
-    print("BNB Support AI (type 'exit' to quit)")
-    while True:
-        user_input = input("builder> ").strip()
-        if not user_input:
-            continue
-        if user_input.lower() in {"exit", "quit"}:
-            print("Goodbye!")
-            break
-        result = agent_executor.invoke({"input": user_input})
-        print(f"assistant> {result['output']}")
+    asyncio.run(_chat_loop(agent_executor))
 
 
 if __name__ == "__main__":
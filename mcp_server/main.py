@@ -4,22 +4,28 @@ from __future__ import annotations
 
 import asyncio
 import os
+import re
 import uuid
 from decimal import Decimal
+from functools import lru_cache
 from typing import Any
 
+import aiohttp
 import httpx
 from dotenv import load_dotenv
 from eth_account import Account
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
-from web3 import Web3
+from web3 import AsyncWeb3, Web3
 
 load_dotenv()
 
 VERIFICATION_URL = os.getenv(
     "VERIFICATION_SERVICE_URL", "http://localhost:8080/verify"
 )
+RELEASE_URL = f"{VERIFICATION_URL.rsplit('/', 1)[0]}/release"
+# Shared secret the verification service requires on /release when set
+RESERVATION_RELEASE_KEY = os.getenv("RESERVATION_RELEASE_KEY")
 BSC_RPC_URL = os.getenv("BSC_RPC_URL")
 TREASURY_SECRET = os.getenv("TREASURY_PRIVATE_KEY")
 DEFAULT_PAYOUT_AMOUNT = Decimal(os.getenv("DEFAULT_PAYOUT_AMOUNT", "0.3"))
@@ -44,11 +50,32 @@ def _derive_account(secret: str) -> Account:
 treasury_account = _derive_account(TREASURY_SECRET)
 treasury_private_key = treasury_account.key
 
-w3 = Web3(Web3.HTTPProvider(BSC_RPC_URL))
-if not w3.is_connected():
-    raise RuntimeError("Unable to connect to BSC RPC endpoint.")
-
-CHAIN_ID = w3.eth.chain_id
+# Async provider so in-flight payouts share the event loop (and one pooled
+# aiohttp session) instead of each blocking a worker thread.
+w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(BSC_RPC_URL))
+RECEIPT_POLL_LATENCY = 0.5
+# The provider's session, created inside the event loop at startup and
+# handed to web3 so shutdown can close it
+_rpc_session: aiohttp.ClientSession | None = None
+
+# Filled in at startup once the RPC is reachable
+CHAIN_ID: int | None = None
+# Transaction fields that never change between payouts
+_TX_TEMPLATE: dict[str, int] = {}
+
+# Process-local nonce counter so concurrent payouts never share a nonce and
+# the RPC is only asked again after a rejected transaction. Taking a nonce,
+# broadcasting it and any resync happen under _nonce_lock, so a resync can
+# never rewind the counter below a nonce that is still being sent.
+_next_nonce = 0
+_nonce_lock = asyncio.Lock()
+
+# Pooled client so verification calls reuse keep-alive connections; idle
+# connections expire before the verification service's 75s keep-alive.
+_verification_client = httpx.AsyncClient(
+    timeout=30,
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+)
 
 app = FastAPI(title="tBNB MCP Server", version="0.2.0")
 
@@ -68,73 +95,195 @@ class DisbursementResponse(BaseModel):
     verification: dict[str, Any]
 
 
+# Submitted disbursements by request_id, updated once the receipt arrives.
+# Settled entries stay pollable for DISBURSEMENT_RETENTION seconds, then go.
+DISBURSEMENT_RETENTION = 3600
+_disbursements: dict[str, DisbursementResponse] = {}
+_confirmations: set[asyncio.Task] = set()
+
+
+@app.on_event("startup")
+async def startup_event() -> None:
+    """Connect to the RPC and load the chain id and treasury nonce."""
+    global CHAIN_ID, _next_nonce, _rpc_session
+    _rpc_session = aiohttp.ClientSession()
+    await w3.provider.cache_async_session(_rpc_session)
+    if not await w3.is_connected():
+        raise RuntimeError("Unable to connect to BSC RPC endpoint.")
+
+    CHAIN_ID = await w3.eth.chain_id
+    _TX_TEMPLATE.update({"gas": PAYOUT_GAS_LIMIT, "chainId": CHAIN_ID})
+    _next_nonce = await w3.eth.get_transaction_count(
+        treasury_account.address, "pending"
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Close pooled HTTP connections."""
+    await _verification_client.aclose()
+    if _rpc_session is not None:
+        await _rpc_session.close()
+
+
 @app.get("/health")
 async def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
 async def verify_wallet(payload: DisbursementRequest) -> dict[str, Any]:
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(
-            VERIFICATION_URL,
-            json={
-                "wallet_address": payload.wallet_address,
-                "github_username": payload.github_username,
-                "requester_id": payload.builder_id,
-                "channel": payload.channel,
-            },
+    resp = await _verification_client.post(
+        VERIFICATION_URL,
+        json={
+            "wallet_address": payload.wallet_address,
+            "github_username": payload.github_username,
+            "requester_id": payload.builder_id,
+            "channel": payload.channel,
+        },
+    )
+    # The verification service rejected the request itself, e.g. a bad address
+    if 400 <= resp.status_code < 500:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Verification request rejected: {resp.text}",
         )
-        resp.raise_for_status()
-        return resp.json()
+    resp.raise_for_status()
+    return resp.json()
 
 
-async def record_payout(github_user_id: int) -> None:
-    """Record successful payout in verification service."""
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(
-            f"{VERIFICATION_URL.rstrip('/verify')}/record-payout",
-            json={"github_user_id": github_user_id},
-        )
+async def release_reservation(token: str | None) -> None:
+    """Give the builder's 24h slot back after a payout that never landed."""
+    if not token:
+        return
+    headers = (
+        {"X-Release-Key": RESERVATION_RELEASE_KEY} if RESERVATION_RELEASE_KEY else {}
+    )
+    try:
+        resp = await _verification_client.post(f"{RELEASE_URL}/{token}", headers=headers)
         resp.raise_for_status()
+    except httpx.HTTPError as exc:
+        # Log but don't mask the original payout failure
+        print(f"Warning: Failed to release reservation: {exc}")
+
+
+# Same shape the verification service accepts: 0x + 40 hex chars
+_ADDR_RE = re.compile(r"\A0x[0-9a-fA-F]{40}\Z")
+
+
+@lru_cache(maxsize=4096)
+def _checksum(wallet_address: str) -> str:
+    """Checksum an address once; repeat payouts to a wallet skip the keccak."""
+    return Web3.to_checksum_address(wallet_address)
+
+
+def _take_nonce() -> int:
+    """Hand out the next treasury nonce. Callers hold _nonce_lock."""
+    global _next_nonce
+    nonce = _next_nonce
+    _next_nonce += 1
+    return nonce
+
+
+async def _resync_nonce() -> None:
+    """
+    Reload the next nonce from the RPC after a rejected transaction.
+    Callers hold _nonce_lock.
+    """
+    global _next_nonce
+    _next_nonce = await w3.eth.get_transaction_count(
+        treasury_account.address, "pending"
+    )
 
 
-def _send_tbnb(wallet_address: str, amount: Decimal) -> str:
-    """Send tBNB to the requested wallet and return the transaction hash."""
-    checksum_address = Web3.to_checksum_address(wallet_address)
+def _is_nonce_error(exc: ValueError) -> bool:
+    message = str(exc).lower()
+    return "nonce too low" in message or "replacement" in message
+
+
+async def _submit_tbnb(wallet_address: str, amount: Decimal) -> str:
+    """Sign and broadcast a tBNB transfer and return the transaction hash."""
+    checksum_address = _checksum(wallet_address)
     value_wei = w3.to_wei(amount, "ether")
     if value_wei <= 0:
         raise ValueError("DEFAULT_PAYOUT_AMOUNT must be positive.")
 
-    nonce = w3.eth.get_transaction_count(treasury_account.address)
-    gas_price = w3.eth.gas_price
+    gas_price = await w3.eth.gas_price
+
+    for attempt in range(2):
+        async with _nonce_lock:
+            tx = {
+                **_TX_TEMPLATE,
+                "to": checksum_address,
+                "value": value_wei,
+                "nonce": _take_nonce(),
+                "gasPrice": gas_price,
+            }
 
-    tx = {
-        "to": checksum_address,
-        "value": value_wei,
-        "nonce": nonce,
-        "gas": PAYOUT_GAS_LIMIT,
-        "gasPrice": gas_price,
-        "chainId": CHAIN_ID,
-    }
+            signed = treasury_account.sign_transaction(tx)
+            try:
+                tx_hash = await w3.eth.send_raw_transaction(signed.rawTransaction)
+            except Exception as exc:
+                # A rejected or undelivered tx leaves a gap or a stale counter;
+                # the "pending" count is right whether or not the node got it
+                await _resync_nonce()
+                if attempt == 0 and isinstance(exc, ValueError) and _is_nonce_error(exc):
+                    continue
+                raise
+        return w3.to_hex(tx_hash)
 
-    signed = treasury_account.sign_transaction(tx)
-    tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    raise RuntimeError("Unable to submit transaction.")
 
-    if receipt.status != 1:
-        raise RuntimeError("On-chain transfer failed.")
 
-    return w3.to_hex(tx_hash)
+async def _await_receipt(tx_hash: str) -> int:
+    """Wait until the transfer is mined and return its receipt status (1 = success)."""
+    receipt = await w3.eth.wait_for_transaction_receipt(
+        tx_hash, poll_latency=RECEIPT_POLL_LATENCY
+    )
+    return receipt.status
 
 
 async def initiate_payout(wallet_address: str) -> str:
-    return await asyncio.to_thread(
-        _send_tbnb, wallet_address, DEFAULT_PAYOUT_AMOUNT
-    )
+    return await _submit_tbnb(wallet_address, DEFAULT_PAYOUT_AMOUNT)
+
+
+async def _confirm_payout(
+    disbursement: DisbursementResponse, reservation_token: str | None
+) -> None:
+    """Wait for the receipt in the background and record the final status."""
+    try:
+        receipt_status = await _await_receipt(disbursement.tx_hash)
+    except Exception as exc:
+        # Timed out or lost the RPC: the broadcast tx may still be mined, so
+        # keep the reservation rather than risk a second payout within 24h
+        disbursement.status = "unknown"
+        disbursement.message = f"Could not confirm transfer: {exc}"
+    else:
+        if receipt_status == 1:
+            disbursement.status = "confirmed"
+            disbursement.message = "Disbursement confirmed on BSC testnet"
+        else:
+            # Only a mined, reverted tx is known not to have paid out
+            disbursement.status = "failed"
+            disbursement.message = "On-chain transfer failed."
+            await release_reservation(reservation_token)
+    finally:
+        _confirmations.discard(asyncio.current_task())
+        asyncio.get_running_loop().call_later(
+            DISBURSEMENT_RETENTION,
+            _disbursements.pop,
+            disbursement.request_id,
+            None,
+        )
 
 
 @app.post("/requests", response_model=DisbursementResponse)
 async def request_tbnb(payload: DisbursementRequest) -> DisbursementResponse:
+    # Reject malformed addresses before verification reserves the payout slot
+    if not _ADDR_RE.match(payload.wallet_address):
+        raise HTTPException(
+            status_code=400, detail="Invalid wallet address: expected 0x + 40 hex chars"
+        )
+
     verification = await verify_wallet(payload)
 
     if not verification.get("verified"):
@@ -144,28 +293,47 @@ async def request_tbnb(payload: DisbursementRequest) -> DisbursementResponse:
             detail=f"Verification failed: {reason}",
         )
 
+    # The token un-records the payout, so it never leaves this server
+    reservation_token = verification.pop("reservation_token", None)
+
     request_id = str(uuid.uuid4())
     try:
         tx_hash = await initiate_payout(payload.wallet_address)
-        
-        # Record successful payout for rate limiting
-        github_user_id = verification.get("github_user_id")
-        if github_user_id:
-            try:
-                await record_payout(github_user_id)
-            except Exception as exc:
-                # Log but don't fail the request - payout already succeeded
-                print(f"Warning: Failed to record payout: {exc}")
-    except Exception as exc:  # pragma: no cover - surfaced to clients
+    except ValueError as exc:
+        # The RPC rejected the send (or it never got that far): nothing was
+        # broadcast, so the builder can retry
+        await release_reservation(reservation_token)
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    except Exception as exc:  # pragma: no cover - surfaced to clients
+        # Transport errors leave it unknown whether the signed tx went out,
+        # so keep the reservation rather than risk a second payout within 24h
+        raise HTTPException(
+            status_code=500, detail=f"Payout outcome unknown: {exc}"
+        ) from exc
 
-    return DisbursementResponse(
+    disbursement = DisbursementResponse(
         request_id=request_id,
-        status="approved",
+        status="submitted",
         message="Disbursement submitted to BSC testnet",
         tx_hash=tx_hash,
         verification=verification,
     )
+    _disbursements[request_id] = disbursement
+    # Keep a reference so the confirmation task isn't garbage collected
+    _confirmations.add(
+        asyncio.create_task(_confirm_payout(disbursement, reservation_token))
+    )
+
+    return disbursement
+
+
+@app.get("/requests/{request_id}", response_model=DisbursementResponse)
+async def get_request(request_id: str) -> DisbursementResponse:
+    """Poll the on-chain status of a previously submitted disbursement."""
+    disbursement = _disbursements.get(request_id)
+    if disbursement is None:
+        raise HTTPException(status_code=404, detail="Unknown request_id")
+    return disbursement
 
 
 if __name__ == "__main__":
@@ -7,31 +7,135 @@ Verifies builders based on:
 - Rate limiting: 24 hours between payouts per GitHub user ID
 """
 
+import asyncio
+import hmac
+import itertools
 import os
+import random
+import re
+import socket
 import sqlite3
-from datetime import datetime, timedelta, timezone
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Annotated
 
-import requests
+import httpx
+import msgspec
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.openapi.utils import get_openapi
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+from starlette.routing import Route
+from starlette.types import Receive, Scope, Send
 
 load_dotenv()
 
 DB_PATH = Path("payouts.db")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")  # Optional: increases rate limit from 60 to 5000/hour
+# Optional comma-separated pool used round-robin; each token adds 5000/hour
+GITHUB_TOKENS = [
+    token.strip()
+    for token in os.getenv("GITHUB_TOKENS", GITHUB_TOKEN or "").split(",")
+    if token.strip()
+]
+
+# /release un-records a payout, so only the MCP server may call it: with a
+# key set callers must send it as X-Release-Key, otherwise only loopback
+# clients are accepted.
+RESERVATION_RELEASE_KEY = os.getenv("RESERVATION_RELEASE_KEY")
+_LOOPBACK_HOSTS = {"127.0.0.1", "::1"}
+
+# Exponential backoff (with jitter) for rate-limited or failing GitHub calls.
+# The deadline bounds a whole lookup, retries included, well inside the MCP
+# server's 30s timeout so /verify never reserves a slot for a caller that
+# has already given up.
+GITHUB_MAX_RETRIES = 5
+GITHUB_RETRY_DEADLINE = 10.0
+_BACKOFF_BASE = 1.0
+_BACKOFF_CAP = 32.0
+
+# Round-robin over GITHUB_TOKENS, skipping tokens that are nearly out of quota
+# until their window resets. Limits are token -> (remaining, reset_epoch).
+_TOKEN_MIN_REMAINING = 10
+_token_cycle = itertools.cycle(GITHUB_TOKENS)
+_token_limits: dict[str, tuple[int, int]] = {}
+
+# In-flight GitHub user lookups keyed by lowercased username
+_inflight_users: dict[str, asyncio.Task] = {}
+
+# Found GitHub users keyed by lowercased username -> (user_data, fetched_at).
+# Account id, age and repo count barely move within the TTL; the payout
+# slot itself is never cached.
+GITHUB_USER_CACHE_TTL = 300.0
+_GITHUB_USER_CACHE_MAX = 10_000
+_github_user_cache: dict[str, tuple[dict, float]] = {}
+
+# Everything verification needs from GitHub in one round trip
+GITHUB_USER_QUERY = """
+query($login: String!) {
+  user(login: $login) {
+    databaseId
+    createdAt
+    repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }
+  }
+}
+"""
+
+# Shared client so GitHub calls reuse pooled keep-alive connections
+_gh = httpx.AsyncClient(http2=True, timeout=10)
+
+# Production skips /docs, /redoc and /openapi.json: no schema build at
+# startup and a smaller route table to match on every request.
+_DOCS_ENABLED = os.getenv("APP_ENV") != "production"
+
+app = FastAPI(
+    title="GitHub Verification Service",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    docs_url="/docs" if _DOCS_ENABLED else None,
+    redoc_url="/redoc" if _DOCS_ENABLED else None,
+    openapi_url="/openapi.json" if _DOCS_ENABLED else None,
+)
 
-app = FastAPI(title="GitHub Verification Service", version="1.0.0")
 
+# BSC address: 0x + 40 hex chars. msgspec compiles the pattern once when the
+# decoders below are built, and checks it while decoding.
+# \A...\Z rather than ^...$, which would also accept a trailing newline.
+WALLET_ADDRESS_PATTERN = r"\A0x[0-9a-fA-F]{40}\Z"
+WalletAddress = Annotated[str, msgspec.Meta(pattern=WALLET_ADDRESS_PATTERN)]
+_WALLET_RE = re.compile(WALLET_ADDRESS_PATTERN)
+
+
+class VerificationRequest(msgspec.Struct):
+    wallet_address: WalletAddress
+    github_username: str
+    requester_id: str | None = None
+    channel: str | None = None
+
+
+class VerificationBatchItem(msgspec.Struct):
+    """/verify_batch entry; the address is checked per entry, not while decoding."""
 
-class VerificationRequest(BaseModel):
     wallet_address: str
     github_username: str
     requester_id: str | None = None
     channel: str | None = None
 
 
+# Compiled once so each request skips re-analysing the Struct type
+_VERIFY_DECODER = msgspec.json.Decoder(VerificationRequest)
+_VERIFY_BATCH_DECODER = msgspec.json.Decoder(list[VerificationBatchItem])
+VERIFY_BATCH_MAX = 100
+# Generous for 100 entries; larger bodies are refused before they are buffered
+VERIFY_BATCH_MAX_BYTES = 64 * 1024
+
+
 class VerificationResponse(BaseModel):
     wallet_address: str
     verified: bool
@@ -40,6 +144,7 @@ class VerificationResponse(BaseModel):
     github_user_id: int | None = None
     repo_count: int | None = None
     account_age_days: int | None = None
+    reservation_token: str | None = None
     
     model_config = {
         "json_schema_extra": {
@@ -52,109 +157,348 @@ class VerificationResponse(BaseModel):
                     "github_user_id": 12345678,
                     "repo_count": 5,
                     "account_age_days": 365,
+                    "reservation_token": "6f1c2d9e-...",
                 }
             ]
         }
     }
 
 
+PAYOUT_COOLDOWN_SECONDS = 24 * 3600
+# Payout times are stored as integer Unix epochs
+PAYOUT_HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS payout_history (
+        github_user_id INTEGER PRIMARY KEY,
+        last_payout_ts INTEGER NOT NULL
+    )
+"""
+
+_db: sqlite3.Connection | None = None
+_db_lock = threading.Lock()
+
+
+def _migrate_iso_timestamps() -> None:
+    """Convert databases that stored payout times as ISO text to Unix epochs."""
+    # Check and convert inside one write transaction so that workers starting
+    # together migrate exactly once.
+    with _db:
+        _db.execute("BEGIN IMMEDIATE")
+        columns = {row[1] for row in _db.execute("PRAGMA table_info(payout_history)")}
+        if "last_payout_timestamp" not in columns:
+            return
+
+        # Old rows hold naive local times, which fromisoformat().timestamp() honours
+        history = [
+            (github_user_id, int(datetime.fromisoformat(ts).timestamp()))
+            for github_user_id, ts in _db.execute(
+                "SELECT github_user_id, last_payout_timestamp FROM payout_history"
+            ).fetchall()
+        ]
+        reservations = [
+            (int(datetime.fromisoformat(ts).timestamp()), token)
+            for token, ts in _db.execute(
+                "SELECT token, reserved_at FROM payout_reservations "
+                "WHERE typeof(reserved_at) = 'text'"
+            ).fetchall()
+        ]
+        _db.execute("DROP TABLE payout_history")
+        _db.execute(PAYOUT_HISTORY_SCHEMA)
+        _db.executemany("INSERT INTO payout_history VALUES (?, ?)", history)
+        _db.executemany(
+            "UPDATE payout_reservations SET reserved_at = ? WHERE token = ?",
+            reservations,
+        )
+
+
 def init_database() -> None:
-    """Initialize SQLite database with minimal schema."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
+    """Open the shared SQLite connection and initialize the minimal schema."""
+    global _db
+    # One autocommit connection for the process lifetime; WAL lets readers
+    # proceed while a reservation is being written.
+    _db = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    _db.execute("PRAGMA journal_mode=WAL")
+    _db.execute("PRAGMA synchronous=NORMAL")
+    _db.execute(PAYOUT_HISTORY_SCHEMA)
+    _db.execute(
         """
-        CREATE TABLE IF NOT EXISTS payout_history (
-            github_user_id INTEGER PRIMARY KEY,
-            last_payout_timestamp TIMESTAMP NOT NULL
+        CREATE TABLE IF NOT EXISTS payout_reservations (
+            token TEXT PRIMARY KEY,
+            github_user_id INTEGER NOT NULL,
+            reserved_at INTEGER NOT NULL
         )
     """
     )
-    conn.commit()
-    conn.close()
+    _migrate_iso_timestamps()
 
 
-def can_collect_tbnb(github_user_id: int) -> tuple[bool, str | None]:
+def reserve_slot(github_user_id: int) -> tuple[str | None, str | None]:
     """
-    Check if GitHub user can collect tBNB (24h cooldown).
-    Returns: (can_collect, error_message)
+    Atomically claim the 24h payout slot for a GitHub user.
+    Returns: (reservation_token, error_message)
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    now = int(time.time())
+    cutoff = now - PAYOUT_COOLDOWN_SECONDS
+    # The connection context commits on exit and rolls back on error
+    with _db_lock, _db:
+        _db.execute("BEGIN IMMEDIATE")
+        reserved = _db.execute(
+            """
+            INSERT INTO payout_history (github_user_id, last_payout_ts)
+            VALUES (?, ?)
+            ON CONFLICT(github_user_id) DO UPDATE
+            SET last_payout_ts = excluded.last_payout_ts
+            WHERE last_payout_ts < ?
+            RETURNING last_payout_ts
+        """,
+            (github_user_id, now, cutoff),
+        ).fetchall()
+        if reserved:
+            token = str(uuid.uuid4())
+            # Reservations can only be released within the 24h window
+            _db.execute("DELETE FROM payout_reservations WHERE reserved_at < ?", (cutoff,))
+            _db.execute(
+                "INSERT INTO payout_reservations VALUES (?, ?, ?)",
+                (token, github_user_id, now),
+            )
+            return (token, None)
+
+        result = _db.execute(
+            "SELECT last_payout_ts FROM payout_history WHERE github_user_id = ?",
+            (github_user_id,),
+        ).fetchone()
+
+    return (None, _cooldown_message(result[0], now))
+
 
-    cursor.execute(
-        "SELECT last_payout_timestamp FROM payout_history WHERE github_user_id = ?",
-        (github_user_id,),
+def payout_cooldown(github_user_id: int) -> str | None:
+    """
+    Read-only counterpart of reserve_slot: the rate-limit message if the user
+    was paid within the last 24h, else None. Claims nothing.
+    """
+    now = int(time.time())
+    with _db_lock:
+        result = _db.execute(
+            "SELECT last_payout_ts FROM payout_history WHERE github_user_id = ?",
+            (github_user_id,),
+        ).fetchone()
+    if result is None or result[0] < now - PAYOUT_COOLDOWN_SECONDS:
+        return None
+    return _cooldown_message(result[0], now)
+
+
+def _cooldown_message(last_payout_ts: int, now: int) -> str:
+    hours_since = (now - last_payout_ts) / 3600
+    hours_remaining = PAYOUT_COOLDOWN_SECONDS / 3600 - hours_since
+    return (
+        f"Rate limited. Last payout was {hours_since:.1f}h ago. "
+        f"Try again in {hours_remaining:.1f} hours"
     )
-    result = cursor.fetchone()
-    conn.close()
 
-    if result is None:
-        return (True, None)  # First time collecting
 
-    last_payout = datetime.fromisoformat(result[0])
-    time_since = datetime.now() - last_payout
+def release_slot(token: str) -> bool:
+    """
+    Roll back a reservation whose payout failed so the user can retry.
+    Returns False if the token is unknown or was already released.
+    """
+    with _db_lock, _db:
+        _db.execute("BEGIN IMMEDIATE")
+        reservation = _db.execute(
+            """
+            DELETE FROM payout_reservations WHERE token = ?
+            RETURNING github_user_id, reserved_at
+        """,
+            (token,),
+        ).fetchall()
+        if reservation:
+            # Any earlier payout was 24h+ old, so dropping the row restores eligibility
+            _db.execute(
+                """
+                DELETE FROM payout_history
+                WHERE github_user_id = ? AND last_payout_ts = ?
+            """,
+                reservation[0],
+            )
+    return bool(reservation)
 
-    if time_since < timedelta(hours=24):
-        hours_remaining = 24 - time_since.total_seconds() / 3600
-        return (
-            False,
-            f"Rate limited. Last payout was {time_since.total_seconds()/3600:.1f}h ago. "
-            f"Try again in {hours_remaining:.1f} hours",
-        )
 
-    return (True, None)
+def _next_token() -> str | None:
+    """Pick the next GitHub token with rate-limit headroom, if any are configured."""
+    if not GITHUB_TOKENS:
+        return None
+    now = time.time()
+    for _ in range(len(GITHUB_TOKENS)):
+        token = next(_token_cycle)
+        remaining, reset = _token_limits.get(token, (_TOKEN_MIN_REMAINING, 0))
+        if remaining >= _TOKEN_MIN_REMAINING or now >= reset:
+            return token
+    # Every token is nearly exhausted; let the retry logic handle the 403s
+    return next(_token_cycle)
 
 
-def record_payout(github_user_id: int) -> None:
-    """Record successful payout timestamp for rate limiting."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def _record_token_limit(token: str, resp: httpx.Response) -> None:
+    remaining = resp.headers.get("X-RateLimit-Remaining", "")
+    reset = resp.headers.get("X-RateLimit-Reset", "")
+    if remaining.isdigit() and reset.isdigit():
+        _token_limits[token] = (int(remaining), int(reset))
 
-    cursor.execute(
-        """
-        INSERT OR REPLACE INTO payout_history 
-        (github_user_id, last_payout_timestamp)
-        VALUES (?, ?)
-    """,
-        (github_user_id, datetime.now().isoformat()),
-    )
-    conn.commit()
-    conn.close()
+
+def _retry_delay(resp: httpx.Response, attempt: int) -> float | None:
+    """
+    Return how long to wait before retrying a GitHub response, or None if the
+    response should be returned as-is.
+    """
+    backoff = min(_BACKOFF_CAP, _BACKOFF_BASE * 2**attempt) + random.uniform(0, _BACKOFF_BASE)
+    status = resp.status_code
+
+    if status == 403 and resp.headers.get("X-RateLimit-Remaining") == "0":
+        reset = resp.headers.get("X-RateLimit-Reset")
+        if not reset or not reset.isdigit():
+            return backoff
+        delay = max(0.0, int(reset) - time.time())
+    elif status in (403, 429) and resp.headers.get("Retry-After", "").isdigit():
+        delay = float(resp.headers["Retry-After"])
+    elif status == 429 or status >= 500:
+        return backoff
+    else:
+        return None
+
+    # Waiting out a long primary rate-limit window would hang the request
+    return delay if delay <= _BACKOFF_CAP else None
 
 
-def verify_builder(github_username: str, wallet_address: str) -> VerificationResponse:
+async def _gh_request_with_retry(
+    method: str,
+    url: str,
+    *,
+    max_retries: int = GITHUB_MAX_RETRIES,
+    **kwargs,
+) -> httpx.Response:
     """
-    Verify builder with GitHub checks + rate limiting.
+    Call the GitHub API, retrying on rate limits and 5xx responses until
+    GITHUB_RETRY_DEADLINE has passed.
     """
-    # Prepare headers with optional GitHub token for higher rate limits
-    headers = {}
-    if GITHUB_TOKEN:
-        headers["Authorization"] = f"token {GITHUB_TOKEN}"
-    
-    # Get GitHub user data
-    try:
-        user_resp = requests.get(
-            f"https://api.github.com/users/{github_username}",
+    deadline = time.monotonic() + GITHUB_RETRY_DEADLINE
+    for attempt in range(max_retries + 1):
+        token = _next_token()
+        headers = {"Authorization": f"token {token}"} if token else {}
+        resp = await _gh.request(
+            method,
+            url,
             headers=headers,
-            timeout=10,
+            timeout=deadline - time.monotonic(),
+            **kwargs,
+        )
+        if token:
+            _record_token_limit(token, resp)
+        delay = _retry_delay(resp, attempt)
+        if delay is None or attempt == max_retries:
+            return resp
+        # Don't start a retry that couldn't finish before the deadline
+        if time.monotonic() + delay >= deadline:
+            return resp
+        await asyncio.sleep(delay)
+    return resp
+
+
+async def _fetch_github_user(github_username: str) -> tuple[dict | None, str | None]:
+    """
+    Serve recent lookups from cache and coalesce concurrent ones into one
+    GitHub call. Only the lookup is shared; each request still reserves its
+    own slot.
+    """
+    key = github_username.lower()
+    cached = _github_user_cache.get(key)
+    if cached and time.monotonic() - cached[1] < GITHUB_USER_CACHE_TTL:
+        return (cached[0], None)
+
+    task = _inflight_users.get(key)
+    if task is None:
+        task = asyncio.create_task(_query_github_user(github_username))
+        _inflight_users[key] = task
+        task.add_done_callback(lambda _: _inflight_users.pop(key, None))
+    # Shield so one client disconnecting doesn't cancel the lookup for the others
+    user_data, error = await asyncio.shield(task)
+
+    if user_data is not None:
+        _github_user_cache.pop(key, None)
+        if len(_github_user_cache) >= _GITHUB_USER_CACHE_MAX:
+            del _github_user_cache[next(iter(_github_user_cache))]
+        _github_user_cache[key] = (user_data, time.monotonic())
+    return (user_data, error)
+
+
+async def _query_github_user(github_username: str) -> tuple[dict | None, str | None]:
+    """
+    Fetch the user fields needed for verification in a single GitHub call.
+    Returns: (user_data, error_message) with user_data shaped like the REST
+    /users/{username} payload (id, public_repos, created_at).
+    """
+    # GraphQL requires authentication, so anonymous callers use REST
+    if not GITHUB_TOKENS:
+        user_resp = await _gh_request_with_retry(
+            "GET", f"https://api.github.com/users/{github_username}"
         )
         if user_resp.status_code != 200:
-            return VerificationResponse(
-                wallet_address=wallet_address,
-                verified=False,
-                confidence=0.0,
-                reason=f"GitHub account not found (status: {user_resp.status_code})",
-            )
-    except requests.RequestException as exc:
-        return VerificationResponse(
+            return (None, f"GitHub account not found (status: {user_resp.status_code})")
+        return (user_resp.json(), None)
+
+    user_resp = await _gh_request_with_retry(
+        "POST",
+        "https://api.github.com/graphql",
+        json={"query": GITHUB_USER_QUERY, "variables": {"login": github_username}},
+    )
+    if user_resp.status_code != 200:
+        return (None, f"GitHub account not found (status: {user_resp.status_code})")
+
+    # GraphQL reports failures as 200 with an errors array
+    body = user_resp.json()
+    errors = body.get("errors") or []
+    if any(error.get("type") == "RATE_LIMITED" for error in errors):
+        return (None, "GitHub API rate limit exceeded, try again later")
+
+    user = (body.get("data") or {}).get("user")
+    if user is None:
+        unexpected = [error for error in errors if error.get("type") != "NOT_FOUND"]
+        if unexpected:
+            return (None, f"GitHub API error: {unexpected[0].get('message', 'unknown')}")
+        return (None, "GitHub account not found")
+
+    return (
+        {
+            "id": user["databaseId"],
+            "public_repos": user["repositories"]["totalCount"],
+            "created_at": user["createdAt"],
+        },
+        None,
+    )
+
+
+async def check_builder(github_username: str, wallet_address: str) -> VerificationResponse:
+    """
+    Run the GitHub checks and the 24h cooldown check without reserving a
+    payout slot, so it is safe to call any number of times.
+
+    Responses use model_construct: every field is produced here with the
+    right type already, so per-request Pydantic validation is skipped.
+    """
+    # Get GitHub user data
+    try:
+        user_data, error = await _fetch_github_user(github_username)
+    except httpx.HTTPError as exc:
+        return VerificationResponse.model_construct(
             wallet_address=wallet_address,
             verified=False,
             confidence=0.0,
             reason=f"Failed to reach GitHub API: {exc}",
         )
+    if user_data is None:
+        return VerificationResponse.model_construct(
+            wallet_address=wallet_address,
+            verified=False,
+            confidence=0.0,
+            reason=error or "GitHub account not found",
+        )
 
-    user_data = user_resp.json()
     github_user_id_raw = user_data.get("id")
     # Ensure github_user_id is an integer (GitHub API returns int, but ensure type safety)
     github_user_id = int(github_user_id_raw) if github_user_id_raw is not None else None
@@ -162,7 +506,7 @@ def verify_builder(github_username: str, wallet_address: str) -> VerificationRes
 
     # Check repo count
     if repo_count < 1:
-        return VerificationResponse(
+        return VerificationResponse.model_construct(
             wallet_address=wallet_address,
             verified=False,
             confidence=0.0,
@@ -177,7 +521,7 @@ def verify_builder(github_username: str, wallet_address: str) -> VerificationRes
         created_at = datetime.fromisoformat(created_at_str.replace("Z", "+00:00"))
         age_days = (datetime.now(timezone.utc) - created_at).days
         if age_days < 30:
-            return VerificationResponse(
+            return VerificationResponse.model_construct(
                 wallet_address=wallet_address,
                 verified=False,
                 confidence=0.0,
@@ -189,14 +533,14 @@ def verify_builder(github_username: str, wallet_address: str) -> VerificationRes
     else:
         age_days = None
 
-    # Check rate limit using GitHub user ID
-    can_collect, rate_limit_msg = can_collect_tbnb(github_user_id)
-    if not can_collect:
-        return VerificationResponse(
+    # Check the rate limit using GitHub user ID
+    rate_limit_msg = payout_cooldown(github_user_id)
+    if rate_limit_msg is not None:
+        return VerificationResponse.model_construct(
             wallet_address=wallet_address,
             verified=False,
             confidence=0.0,
-            reason=rate_limit_msg or "Rate limited",
+            reason=rate_limit_msg,
             github_user_id=github_user_id,
             repo_count=repo_count,
             account_age_days=age_days,
@@ -204,7 +548,7 @@ def verify_builder(github_username: str, wallet_address: str) -> VerificationRes
 
     # All checks passed
     confidence = min(1.0, 0.7 + (repo_count * 0.05))
-    return VerificationResponse(
+    return VerificationResponse.model_construct(
         wallet_address=wallet_address,
         verified=True,
         confidence=confidence,
@@ -215,42 +559,373 @@ def verify_builder(github_username: str, wallet_address: str) -> VerificationRes
     )
 
 
+async def verify_builder(github_username: str, wallet_address: str) -> VerificationResponse:
+    """Verify builder with GitHub checks, then reserve the 24h payout slot."""
+    result = await check_builder(github_username, wallet_address)
+    if not result.verified:
+        return result
+
+    # Reserve the rate-limit slot using GitHub user ID
+    reservation_token, rate_limit_msg = reserve_slot(result.github_user_id)
+    if reservation_token is None:
+        # Another request claimed the slot after the cooldown check
+        result.verified = False
+        result.confidence = 0.0
+        result.reason = rate_limit_msg or "Rate limited"
+        return result
+
+    result.reservation_token = reservation_token
+    return result
+
+
+_HEALTH_BODY = b'{"status":"ok"}'
+_INVALID_REQUEST_BODY = b'{"detail":"invalid"}'
+_MISSING_USERNAME_BODY = b'{"detail":"github_username is required for verification"}'
+_BATCH_TOO_LARGE_BODY = orjson.dumps(
+    {
+        "detail": f"at most {VERIFY_BATCH_MAX} verification requests "
+        f"({VERIFY_BATCH_MAX_BYTES // 1024} KiB) per batch"
+    }
+)
+
+
 @app.on_event("startup")
 def startup_event() -> None:
     """Initialize database on startup."""
     init_database()
 
 
-@app.get("/health")
-def health() -> dict[str, str]:
-    """Simple health endpoint for container/runtime checks."""
-    return {"status": "ok"}
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """Close the shared GitHub client and database connection."""
+    await _gh.aclose()
+    if _db is not None:
+        _db.close()
+
+
+async def _read_body(receive: Receive, max_bytes: int | None = None) -> bytes | None:
+    """Buffer the request body, or return None once it grows past max_bytes."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        if max_bytes is not None and len(body) > max_bytes:
+            return None
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _send_json(send: Send, status: int, body: bytes) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+# Compiled serializers: model -> JSON bytes in Rust, no intermediate dict
+_RESPONSE_ADAPTER = TypeAdapter(VerificationResponse)
+_BATCH_RESPONSE_ADAPTER = TypeAdapter(list[VerificationResponse])
+
+
+class HealthEndpoint:
+    """Simple health endpoint for container/runtime checks, served as fixed bytes."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await _send_json(send, 200, _HEALTH_BODY)
+
+
+class VerifyEndpoint:
+    """
+    Raw ASGI handler for POST /verify. The hot route bypasses FastAPI's
+    dependency solving, validation and response encoding: msgspec decodes
+    the body, pydantic-core serializes the result straight to bytes.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            payload = _VERIFY_DECODER.decode(await _read_body(receive))
+        except msgspec.MsgspecError:
+            await _send_json(send, 422, _INVALID_REQUEST_BODY)
+            return
+
+        if not payload.github_username:
+            await _send_json(send, 400, _MISSING_USERNAME_BODY)
+            return
+
+        result = await verify_builder(payload.github_username, payload.wallet_address)
+        await _send_json(send, 200, _RESPONSE_ADAPTER.dump_json(result))
 
 
-@app.post("/verify", response_model=VerificationResponse)
-def verify_wallet(payload: VerificationRequest) -> VerificationResponse:
-    """Verify wallet request with GitHub checks."""
-    if not payload.github_username:
-        raise HTTPException(
-            status_code=400, detail="github_username is required for verification"
+class VerifyBatchEndpoint:
+    """
+    Raw ASGI handler for POST /verify_batch: a JSON list of verification
+    requests answered with a list of results in the same order, so callers
+    pay connection and routing overhead once for many wallets.
+
+    Batch results are eligibility checks only: no payout slot is reserved
+    and no reservation_token is returned. Payouts still go through /verify.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = await _read_body(receive, VERIFY_BATCH_MAX_BYTES)
+        if body is None:
+            await _send_json(send, 413, _BATCH_TOO_LARGE_BODY)
+            return
+
+        try:
+            payloads = _VERIFY_BATCH_DECODER.decode(body)
+        except msgspec.MsgspecError:
+            await _send_json(send, 422, _INVALID_REQUEST_BODY)
+            return
+
+        if len(payloads) > VERIFY_BATCH_MAX:
+            await _send_json(send, 413, _BATCH_TOO_LARGE_BODY)
+            return
+
+        results = await asyncio.gather(
+            *(_check_batch_item(payload) for payload in payloads)
         )
+        await _send_json(send, 200, _BATCH_RESPONSE_ADAPTER.dump_json(results))
 
-    return verify_builder(payload.github_username, payload.wallet_address)
 
+async def _check_batch_item(payload: VerificationBatchItem) -> VerificationResponse:
+    # One bad entry shouldn't fail the whole batch
+    if not _WALLET_RE.match(payload.wallet_address):
+        reason = "Invalid wallet address"
+    elif not payload.github_username:
+        reason = "github_username is required for verification"
+    else:
+        return await check_builder(payload.github_username, payload.wallet_address)
+    return VerificationResponse.model_construct(
+        wallet_address=payload.wallet_address,
+        verified=False,
+        confidence=0.0,
+        reason=reason,
+    )
 
-class RecordPayoutRequest(BaseModel):
-    github_user_id: int
 
+app.router.routes.append(Route("/health", HealthEndpoint(), methods=["GET"]))
+app.router.routes.append(Route("/verify", VerifyEndpoint(), methods=["POST"]))
+app.router.routes.append(
+    Route("/verify_batch", VerifyBatchEndpoint(), methods=["POST"])
+)
+
+
+def _json_operation(
+    summary: str,
+    request_schema: dict | None,
+    response_schema: dict,
+    errors: dict[str, str],
+) -> dict:
+    operation = {
+        "summary": summary,
+        "responses": {
+            "200": {
+                "description": "Successful Response",
+                "content": {"application/json": {"schema": response_schema}},
+            },
+            **{status: {"description": text} for status, text in errors.items()},
+        },
+    }
+    if request_schema is not None:
+        operation["requestBody"] = {
+            "required": True,
+            "content": {"application/json": {"schema": request_schema}},
+        }
+    return operation
 
-@app.post("/record-payout")
-def record_payout_endpoint(payload: RecordPayoutRequest) -> dict[str, str | int]:
-    """Record successful payout for rate limiting."""
-    record_payout(payload.github_user_id)
-    return {"status": "recorded", "github_user_id": payload.github_user_id}
 
+def custom_openapi() -> dict:
+    """
+    FastAPI only documents its own routes, so add the raw ASGI ones by hand:
+    request schemas come from the msgspec Structs, responses from Pydantic.
+    """
+    if app.openapi_schema is not None:
+        return app.openapi_schema
+
+    schema = get_openapi(title=app.title, version=app.version, routes=app.routes)
+    ref_template = "#/components/schemas/{name}"
+    (verify_request, batch_request), request_components = (
+        msgspec.json.schema_components(
+            [VerificationRequest, list[VerificationBatchItem]],
+            ref_template=ref_template,
+        )
+    )
+    components = schema.setdefault("components", {}).setdefault("schemas", {})
+    components.update(request_components)
+    components["VerificationResponse"] = VerificationResponse.model_json_schema(
+        ref_template="#/components/schemas/{model}"
+    )
+    verify_response = {"$ref": ref_template.format(name="VerificationResponse")}
+
+    schema["paths"].update(
+        {
+            "/health": {
+                "get": _json_operation(
+                    "Health",
+                    None,
+                    {"type": "object", "properties": {"status": {"type": "string"}}},
+                    {},
+                )
+            },
+            "/verify": {
+                "post": _json_operation(
+                    "Verify Wallet",
+                    verify_request,
+                    verify_response,
+                    {
+                        "400": "github_username is missing",
+                        "422": "Malformed body or wallet address",
+                    },
+                )
+            },
+            "/verify_batch": {
+                "post": _json_operation(
+                    "Check Wallets (no payout slot is reserved)",
+                    batch_request,
+                    {"type": "array", "items": verify_response},
+                    {
+                        "413": f"More than {VERIFY_BATCH_MAX} entries or "
+                        f"{VERIFY_BATCH_MAX_BYTES // 1024} KiB",
+                        "422": "Malformed body",
+                    },
+                )
+            },
+        }
+    )
+    app.openapi_schema = schema
+    return schema
 
-if __name__ == "__main__":
+
+app.openapi = custom_openapi
+
+
+def _is_internal_caller(request: Request) -> bool:
+    if RESERVATION_RELEASE_KEY:
+        return hmac.compare_digest(
+            request.headers.get("X-Release-Key", ""), RESERVATION_RELEASE_KEY
+        )
+    return request.client is not None and request.client.host in _LOOPBACK_HOSTS
+
+
+@app.post("/release/{token}")
+def release_reservation(token: str, request: Request) -> dict[str, str]:
+    """Release a payout reservation after a failed disbursement. Internal callers only."""
+    if not _is_internal_caller(request):
+        raise HTTPException(status_code=403, detail="Release is restricted to the MCP server")
+    if not release_slot(token):
+        raise HTTPException(status_code=404, detail="Unknown reservation token")
+    return {"status": "released", "token": token}
+
+
+HOST = "0.0.0.0"
+PORT = 8080
+SOCKET_BUFFER_SIZE = 2 * 1024 * 1024
+WORKER_RESTART_DELAY = 1.0
+# uvloop has no Windows build; elsewhere pin the C event loop and parser
+_SERVER_OPTIONS = {
+    "loop": "asyncio" if sys.platform == "win32" else "uvloop",
+    "http": "httptools",
+    "access_log": False,
+    # Keep idle client connections open well past the callers' pool expiry
+    "timeout_keep_alive": 75,
+}
+
+
+def _bind_socket(reuse_port: bool = False) -> socket.socket:
+    """Bind the listening socket with the options every run mode shares."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    # Accepted connections inherit these: no Nagle delay on small responses
+    # and roomier buffers (the kernel clamps them to net.core.*mem_max)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+    sock.bind((HOST, PORT))
+    return sock
+
+
+def _serve_reuseport_worker() -> None:
+    """
+    Run one worker on its own SO_REUSEPORT listening socket, so the kernel
+    spreads incoming connections across per-worker accept queues.
+    """
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8080)
+    sock = _bind_socket(reuse_port=True)
+    uvicorn.Server(uvicorn.Config(app, **_SERVER_OPTIONS)).run(sockets=[sock])
+
 
+def _supervise_reuseport_workers(count: int) -> None:
+    """
+    Keep `count` SO_REUSEPORT workers running, restarting any that crash or
+    fail to bind, until SIGINT/SIGTERM stops them all.
+    """
+    import multiprocessing
+    import signal
+    from multiprocessing.connection import wait
+
+    processes: dict[int, multiprocessing.Process] = {}
+
+    def spawn() -> None:
+        process = multiprocessing.Process(target=_serve_reuseport_worker)
+        process.start()
+        processes[process.sentinel] = process
+
+    # Turn SIGTERM into SystemExit so the workers are stopped, not orphaned
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    for _ in range(count):
+        spawn()
+    try:
+        while True:
+            for sentinel in wait(list(processes)):
+                process = processes.pop(sentinel)
+                print(
+                    f"Worker {process.pid} exited with code {process.exitcode}; restarting"
+                )
+                # Don't spin if a worker dies straight away (e.g. port in use)
+                time.sleep(WORKER_RESTART_DELAY)
+                spawn()
+    except (KeyboardInterrupt, SystemExit):
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Workers are separate processes (one GIL each). Payout slots live in
+    # SQLite and are shared, but token quota tracking, lookup coalescing and
+    # the GitHub user cache are per process, so each extra worker spends its
+    # own GitHub quota. Hence a single worker unless asked for more.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if workers > 1 and hasattr(socket, "SO_REUSEPORT"):
+        _supervise_reuseport_workers(workers)
+    elif workers > 1:
+        from uvicorn.supervisors import Multiprocess
+
+        # uvicorn's own workers share one socket and need an import string
+        config = uvicorn.Config(
+            "main:app",
+            app_dir=str(Path(__file__).resolve().parent),
+            workers=workers,
+            **_SERVER_OPTIONS,
+        )
+        server = uvicorn.Server(config)
+        Multiprocess(config, target=server.run, sockets=[_bind_socket()]).run()
+    else:
+        uvicorn.Server(uvicorn.Config(app, **_SERVER_OPTIONS)).run(
+            sockets=[_bind_socket()]
+        )